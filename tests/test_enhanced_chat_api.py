@@ -0,0 +1,83 @@
+"""
+Test Enhanced Chat API
+Checks precomputed answers and keyword classification against a sample standard
+"""
+import sys
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("sentence_transformers")
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "tools"))
+
+from enhanced_chat_api import APPLICATIONS, PARAMETER_TYPES, EnhancedStandardsChatBot
+from standards_extraction import extract_parameters_from_document
+
+SAMPLE_STANDARD = """
+Office work: maintained illuminance 500 lux minimum, UGR max 19, CRI >= 80.
+Conference rooms: minimum 300 lux, glare max 19.
+Corridors: illuminance: 100 lux, color rendering min 80.
+"""
+
+def _make_bot():
+    """Create a chat bot from sample text without loading the embedding model"""
+    bot = EnhancedStandardsChatBot.__new__(EnhancedStandardsChatBot)
+    bot.standards_data = {"sample.pdf": {"text_content": SAMPLE_STANDARD}}
+    bot.embedding_model = None
+    bot.qa_embeddings = None
+    bot.extracted_parameters = extract_parameters_from_document("sample.pdf", SAMPLE_STANDARD)
+    bot._answer_cache = bot._precompute_answers()
+    bot.request_stats = {'requests': 0, 'encoder_skipped': 0}
+    return bot
+
+def test_precomputed_answers_from_sample_standard():
+    """Cached answers carry the values extracted from the sample standard"""
+    bot = _make_bot()
+    assert set(bot._answer_cache) == {(pt, app) for pt in PARAMETER_TYPES for app in APPLICATIONS + [None]}
+
+    office = bot._answer_cache[('illuminance', 'office')]
+    assert office['answer'].startswith(
+        "Based on the standards data, illuminance requirements are: For office, minimum 500 lux, maximum 500 lux"
+    )
+    assert office['extracted_data']['min'] == 500
+    assert office['sources'] == ["sample.pdf"]
+
+    overall = bot._answer_cache[('illuminance', None)]['extracted_data']
+    assert (overall['min'], overall['max']) == (100, 500)
+
+    ugr = bot._answer_cache[('ugr', 'conference')]
+    assert ugr['answer'].startswith("Based on the standards data, UGR (Unified Glare Rating) should be ≤19")
+    assert ugr['recommendations'] == [
+        "Use luminaires with good glare control",
+        "Consider indirect lighting for computer areas"
+    ]
+
+    cri = bot._answer_cache[('cri', None)]
+    assert cri['recommendations'] == [
+        "Use high-quality LED luminaires with good color rendering",
+        "Consider CRI ≥90 for color-critical tasks"
+    ]
+
+    missing = bot._answer_cache[('power_density', 'office')]
+    assert missing['confidence'] == 0.3
+    assert missing['extracted_data'] is None
+
+def test_keyword_question_uses_cache():
+    """Keyword questions are answered from the cache without the encoder"""
+    bot = _make_bot()
+
+    response = bot.generate_response("What is the UGR limit for conference rooms?")
+
+    assert response.answer == bot._answer_cache[('ugr', 'conference')]['answer']
+    assert bot.request_stats == {'requests': 1, 'encoder_skipped': 1}
+
+def test_substring_keyword_does_not_skip_encoder():
+    """Keywords inside longer words ("criteria", "describe") do not short-circuit to a cached answer"""
+    bot = _make_bot()
+
+    response = bot.generate_response("What are the lighting criteria for a corridor?")
+
+    assert response.answer != bot._answer_cache[('cri', 'corridor')]['answer']
+    assert bot.request_stats == {'requests': 1, 'encoder_skipped': 0}
@@ -0,0 +1,52 @@
+"""
+Test PDF Study Analyzer
+Checks structured extraction through the tagged master regex against a sample study
+"""
+import sys
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("fitz")
+pytest.importorskip("pdfplumber")
+pytest.importorskip("pdfminer")
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "tools"))
+
+from pdf_study_analyzer import PDFStudyAnalyzer
+
+SAMPLE_STUDY = """
+Office lighting study
+Task area: 300 - 500 lux
+Corridor 150 to 200 lux
+UGR: 19
+CRI >= 80
+Uniformity: 0.6
+Power density 3.5 W/m2
+"""
+
+def _values(findings):
+    """(value, pattern_id) pairs of a parameter's findings"""
+    return [(finding.value, finding.pattern_id) for finding in findings]
+
+def test_structured_data_from_sample_study(tmp_path, monkeypatch):
+    """Each parameter gets the first group of the pattern that matched, ranges included"""
+    monkeypatch.chdir(tmp_path)
+    analyzer = PDFStudyAnalyzer()
+    extracted = analyzer._extract_structured_data(SAMPLE_STUDY, SAMPLE_STUDY.lower())
+
+    # Two-group range patterns yield their lower bound, not the whole match or the upper bound
+    assert _values(extracted['illuminance']) == [(300, 5), (150, 6), (0.6, 14), (3.5, 18)]
+    assert _values(extracted['ugr']) == [(19, 3)]
+    assert _values(extracted['cri']) == [(80, 0)]
+    # Matches do not overlap, so text claimed by illuminance patterns is not matched again
+    assert extracted['uniformity'] == []
+    assert extracted['power_density'] == []
+
+def test_structured_data_without_matches(tmp_path, monkeypatch):
+    """Text without any lighting values yields empty lists for every parameter"""
+    monkeypatch.chdir(tmp_path)
+    analyzer = PDFStudyAnalyzer()
+    text = "No lighting values here"
+    extracted = analyzer._extract_structured_data(text, text.lower())
+    assert extracted == {'illuminance': [], 'ugr': [], 'cri': [], 'uniformity': [], 'power_density': []}
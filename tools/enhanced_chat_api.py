@@ -6,19 +6,86 @@ from fastapi import FastAPI, HTTPException
 from pydantic import BaseModel
 from typing import List, Dict, Optional, Tuple
 import json
+import os
 import re
 from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
 import numpy as np
+import torch
 from sentence_transformers import SentenceTransformer
 from sklearn.metrics.pairwise import cosine_similarity
 import logging
+from standards_extraction import extract_parameters_from_document
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Optional dependency for single-pass keyword matching
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
+
+try:
+    import simsimd
+    SIMSIMD_AVAILABLE = True
+except ImportError:
+    SIMSIMD_AVAILABLE = False
+
+# Use int8-quantized Q&A embeddings for similarity search (FP32 is used otherwise)
+INT8_SIMILARITY = os.getenv("CHAT_INT8_SIMILARITY", "false").lower() == "true"
+# Run the sentence encoder through onnxruntime instead of PyTorch
+ONNX_ENCODER = os.getenv("CHAT_ONNX_ENCODER", "false").lower() == "true"
+# Total standards text (characters) above which parameter extraction uses a process pool
+PARALLEL_EXTRACTION_MIN_CHARS = 10_000_000
+# Directory holding the exported ONNX encoder; it is exported there on first use if missing
+ONNX_MODEL_DIR = Path(os.getenv("CHAT_ONNX_MODEL_DIR", "models/onnx/all-MiniLM-L6-v2"))
+
 app = FastAPI(title="Enhanced Lighting Standards Chat API", version="2.0.0")
 
+# Parameter types and applications recognised by the question classifier
+PARAMETER_TYPES = ['illuminance', 'ugr', 'cri', 'power_density', 'uniformity']
+APPLICATIONS = ['office', 'conference', 'corridor', 'reception']
+
+# Keywords that must all appear in a question to select a parameter type
+PARAMETER_KEYWORDS = {
+    'illuminance': ('illuminance',),
+    'ugr': ('ugr',),
+    'cri': ('cri',),
+    'power_density': ('power', 'density'),
+    'uniformity': ('uniformity',)
+}
+QUESTION_KEYWORDS = sorted({kw for kws in PARAMETER_KEYWORDS.values() for kw in kws} | set(APPLICATIONS))
+# Keywords only count as whole words (optionally plural), so "criteria" is not read as CRI
+QUESTION_KEYWORD_PATTERN = re.compile(r'\b(' + '|'.join(map(re.escape, QUESTION_KEYWORDS)) + r')s?\b')
+
+def _is_whole_word(text: str, start: int, end: int) -> bool:
+    """Check that text[start:end] is not part of a longer word, allowing a plural 's'"""
+    if start > 0 and text[start - 1].isalnum():
+        return False
+    if end < len(text) and text[end] == 's':
+        end += 1
+    return end >= len(text) or not text[end].isalnum()
+
+def _build_keyword_automaton():
+    """Build an Aho-Corasick automaton over all question keywords"""
+    if not AHOCORASICK_AVAILABLE:
+        return None
+    automaton = ahocorasick.Automaton()
+    for keyword in QUESTION_KEYWORDS:
+        automaton.add_word(keyword, keyword)
+    automaton.make_automaton()
+    return automaton
+
+KEYWORD_AUTOMATON = _build_keyword_automaton()
+
+def _quantize_int8(embeddings: np.ndarray) -> np.ndarray:
+    """Quantize embeddings row-wise to int8 (cosine similarity ignores the per-row scale)"""
+    scale = 127 / np.maximum(np.max(np.abs(embeddings), axis=1, keepdims=True), 1e-12)
+    return np.round(embeddings * scale).astype(np.int8)
+
 class ChatMessage(BaseModel):
     message: str
     context: Optional[str] = None
@@ -30,6 +97,41 @@ class ChatResponse(BaseModel):
     recommendations: List[str]
     extracted_data: Optional[Dict] = None
 
+def _import_onnx():
+    """Import the ONNX runtime stack only when the ONNX encoder is enabled; raises ImportError if missing"""
+    import onnxruntime
+    from optimum.onnxruntime import ORTModelForFeatureExtraction
+    from transformers import AutoTokenizer
+    return onnxruntime, ORTModelForFeatureExtraction, AutoTokenizer
+
+class ONNXSentenceEncoder:
+    """all-MiniLM-L6-v2 encoder running on onnxruntime, mirroring SentenceTransformer.encode"""
+    
+    def __init__(self, model_dir: Path = ONNX_MODEL_DIR):
+        onnxruntime, ORTModelForFeatureExtraction, AutoTokenizer = _import_onnx()
+        session_options = onnxruntime.SessionOptions()
+        session_options.intra_op_num_threads = max(1, (os.cpu_count() or 2) // 2)
+        self.tokenizer = AutoTokenizer.from_pretrained(model_dir)
+        self.model = ORTModelForFeatureExtraction.from_pretrained(model_dir, session_options=session_options)
+    
+    @staticmethod
+    def export(model_dir: Path = ONNX_MODEL_DIR, model_name: str = 'sentence-transformers/all-MiniLM-L6-v2'):
+        """Convert the PyTorch encoder to ONNX and save it with its tokenizer"""
+        _, ORTModelForFeatureExtraction, AutoTokenizer = _import_onnx()
+        model_dir = Path(model_dir)
+        model_dir.mkdir(parents=True, exist_ok=True)
+        ORTModelForFeatureExtraction.from_pretrained(model_name, export=True).save_pretrained(model_dir)
+        AutoTokenizer.from_pretrained(model_name).save_pretrained(model_dir)
+        logger.info(f"Exported ONNX embedding model to {model_dir}")
+    
+    def encode(self, sentences: List[str]) -> np.ndarray:
+        """Encode sentences with mean pooling and L2 normalization"""
+        inputs = self.tokenizer(sentences, padding=True, truncation=True, return_tensors='np')
+        token_embeddings = self.model(**inputs).last_hidden_state
+        mask = inputs['attention_mask'][..., None].astype(np.float32)
+        pooled = (token_embeddings * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        return pooled / np.linalg.norm(pooled, axis=1, keepdims=True)
+
 class EnhancedStandardsChatBot:
     """Enhanced chat bot that uses actual standards data and AI"""
     
@@ -38,19 +140,61 @@ class EnhancedStandardsChatBot:
         self.embedding_model = self._load_embedding_model()
         self.qa_embeddings = self._create_qa_embeddings()
         self.extracted_parameters = self._extract_parameters_from_standards()
+        self._answer_cache: Dict[Tuple[str, Optional[str]], Dict] = self._precompute_answers()
+        self.request_stats = {'requests': 0, 'encoder_skipped': 0}
         logger.info(f"Loaded {len(self.standards_data)} standards documents")
         logger.info(f"Extracted {len(self.extracted_parameters)} parameters")
     
     def _load_embedding_model(self):
         """Load sentence transformer model"""
         try:
+            if ONNX_ENCODER:
+                try:
+                    _import_onnx()
+                except ImportError:
+                    logger.warning("CHAT_ONNX_ENCODER is set but onnxruntime/optimum are not installed, using the PyTorch encoder")
+                else:
+                    if not (ONNX_MODEL_DIR / "model.onnx").exists():
+                        ONNXSentenceEncoder.export(ONNX_MODEL_DIR)
+                    model = ONNXSentenceEncoder(ONNX_MODEL_DIR)
+                    logger.info("Loaded ONNX embedding model successfully")
+                    return model
+            torch.set_num_threads(max(1, (os.cpu_count() or 2) // 2))
             model = SentenceTransformer('all-MiniLM-L6-v2')
             logger.info("Loaded embedding model successfully")
-            return model
+            return self._reduce_precision(model)
         except Exception as e:
             logger.error(f"Failed to load embedding model: {e}")
             return None
     
+    def _reduce_precision(self, model, max_drift: float = 1e-3):
+        """Run the encoder in FP16 (GPU) or BF16 (CPU with AVX512-BF16) if outputs stay close to FP32"""
+        if torch.cuda.is_available():
+            dtype = torch.float16
+        elif getattr(torch.cpu, '_is_avx512_bf16_supported', lambda: False)():
+            dtype = torch.bfloat16
+        else:
+            return model
+        
+        reference = [
+            "What is the illuminance requirement for office work?",
+            "What is the UGR limit for conference rooms?",
+            "What is CRI?"
+        ]
+        try:
+            gold = model.encode(reference, normalize_embeddings=True)
+            model[0].auto_model.to(dtype)
+            reduced = np.asarray(model.encode(reference, normalize_embeddings=True), dtype=np.float32)
+            drift = float(np.max(1.0 - np.sum(gold * reduced, axis=1)))
+            if drift <= max_drift:
+                logger.info(f"Using {dtype} embedding model (cosine drift {drift:.2e})")
+                return model
+            logger.info(f"Keeping FP32 embedding model, {dtype} cosine drift {drift:.2e} too high")
+        except Exception as e:
+            logger.error(f"Could not reduce embedding model precision: {e}")
+        model[0].auto_model.to(torch.float32)
+        return model
+    
     def _load_standards(self):
         """Load standards data from processed documents"""
         standards = {}
@@ -70,82 +214,29 @@ class EnhancedStandardsChatBot:
     def _extract_parameters_from_standards(self):
         """Extract lighting parameters from standards data"""
         parameters = {}
+        doc_names = list(self.standards_data.keys())
+        texts = [doc_data.get('text_content', '') for doc_data in self.standards_data.values()]
         
-        for doc_name, doc_data in self.standards_data.items():
-            text_content = doc_data.get('text_content', '')
-            
-            # Extract illuminance values
-            illuminance_patterns = [
-                r'(\d+)\s*lux\s*(?:minimum|min|≥|>=)',
-                r'(?:minimum|min|≥|>=)\s*(\d+)\s*lux',
-                r'illuminance[:\s]*(\d+)\s*lux',
-                r'(\d+)\s*lx\s*(?:minimum|min|≥|>=)',
-                r'(?:minimum|min|≥|>=)\s*(\d+)\s*lx'
-            ]
-            
-            for pattern in illuminance_patterns:
-                matches = re.findall(pattern, text_content, re.IGNORECASE)
-                for match in matches:
-                    value = int(match)
-                    if 'illuminance' not in parameters:
-                        parameters['illuminance'] = []
-                    parameters['illuminance'].append({
-                        'value': value,
-                        'source': doc_name,
-                        'context': self._extract_context(text_content, match)
-                    })
-            
-            # Extract UGR values
-            ugr_patterns = [
-                r'UGR[:\s]*(?:≤|<=|maximum|max)\s*(\d+)',
-                r'(?:≤|<=|maximum|max)\s*(\d+)\s*UGR',
-                r'glare[:\s]*(?:≤|<=|maximum|max)\s*(\d+)'
-            ]
-            
-            for pattern in ugr_patterns:
-                matches = re.findall(pattern, text_content, re.IGNORECASE)
-                for match in matches:
-                    value = int(match)
-                    if 'ugr' not in parameters:
-                        parameters['ugr'] = []
-                    parameters['ugr'].append({
-                        'value': value,
-                        'source': doc_name,
-                        'context': self._extract_context(text_content, match)
-                    })
-            
-            # Extract CRI values
-            cri_patterns = [
-                r'CRI[:\s]*(?:≥|>=|minimum|min)\s*(\d+)',
-                r'(?:≥|>=|minimum|min)\s*(\d+)\s*CRI',
-                r'color rendering[:\s]*(?:≥|>=|minimum|min)\s*(\d+)'
-            ]
-            
-            for pattern in cri_patterns:
-                matches = re.findall(pattern, text_content, re.IGNORECASE)
-                for match in matches:
-                    value = int(match)
-                    if 'cri' not in parameters:
-                        parameters['cri'] = []
-                    parameters['cri'].append({
-                        'value': value,
-                        'source': doc_name,
-                        'context': self._extract_context(text_content, match)
-                    })
+        # Worker start-up outweighs the regex work unless there is a lot of text
+        if len(doc_names) > 1 and sum(map(len, texts)) >= PARALLEL_EXTRACTION_MIN_CHARS:
+            with ProcessPoolExecutor(max_workers=min(len(doc_names), os.cpu_count() or 1)) as executor:
+                doc_parameters = list(executor.map(extract_parameters_from_document, doc_names, texts))
+        else:
+            doc_parameters = [extract_parameters_from_document(name, text) for name, text in zip(doc_names, texts)]
+        
+        for partial in doc_parameters:
+            for parameter_type, values in partial.items():
+                parameters.setdefault(parameter_type, []).extend(values)
         
         return parameters
     
-    def _extract_context(self, text: str, match: str, context_length: int = 100):
-        """Extract context around a match"""
-        try:
-            index = text.lower().find(match.lower())
-            if index != -1:
-                start = max(0, index - context_length)
-                end = min(len(text), index + len(match) + context_length)
-                return text[start:end].strip()
-        except:
-            pass
-        return ""
+    def _precompute_answers(self) -> Dict[Tuple[str, Optional[str]], Dict]:
+        """Precompute answers for every (parameter type, application) combination"""
+        answers = {}
+        for parameter_type in PARAMETER_TYPES:
+            for application in APPLICATIONS + [None]:
+                answers[(parameter_type, application)] = self._generate_enhanced_answer("", parameter_type, application)
+        return answers
     
     def _create_qa_embeddings(self):
         """Create embeddings for Q&A pairs"""
@@ -167,11 +258,16 @@ class EnhancedStandardsChatBot:
         if self.embedding_model:
             questions = list(qa_pairs.values())
             embeddings = self.embedding_model.encode(questions)
-            return {
+            qa_embeddings = {
                 'questions': questions,
                 'embeddings': embeddings,
                 'qa_pairs': qa_pairs
             }
+            if INT8_SIMILARITY and SIMSIMD_AVAILABLE:
+                normalized = embeddings / np.linalg.norm(embeddings, axis=1, keepdims=True)
+                qa_embeddings['int8_embeddings'] = _quantize_int8(normalized)
+                logger.info("Using int8-quantized Q&A embeddings")
+            return qa_embeddings
         return None
     
     def _find_best_match_ai(self, question: str) -> Tuple[Optional[str], float]:
@@ -181,7 +277,12 @@ class EnhancedStandardsChatBot:
         
         try:
             question_embedding = self.embedding_model.encode([question])
-            similarities = cosine_similarity(question_embedding, self.qa_embeddings['embeddings'])[0]
+            if 'int8_embeddings' in self.qa_embeddings:
+                question_int8 = _quantize_int8(question_embedding)
+                distances = simsimd.cdist(question_int8, self.qa_embeddings['int8_embeddings'], metric='cosine')
+                similarities = 1.0 - np.asarray(distances, dtype=np.float32)[0]
+            else:
+                similarities = cosine_similarity(question_embedding, self.qa_embeddings['embeddings'])[0]
             
             best_index = np.argmax(similarities)
             best_similarity = similarities[best_index]
@@ -289,43 +390,43 @@ class EnhancedStandardsChatBot:
         
         return recommendations
     
+    def _classify_question(self, question_lower: str) -> Tuple[Optional[str], Optional[str]]:
+        """Determine parameter type and application from whole-word question keywords"""
+        if KEYWORD_AUTOMATON is not None:
+            hits = {
+                keyword for end, keyword in KEYWORD_AUTOMATON.iter(question_lower)
+                if _is_whole_word(question_lower, end - len(keyword) + 1, end + 1)
+            }
+        else:
+            hits = set(QUESTION_KEYWORD_PATTERN.findall(question_lower))
+        
+        parameter_type = next(
+            (pt for pt in PARAMETER_TYPES if all(kw in hits for kw in PARAMETER_KEYWORDS[pt])), None
+        )
+        application = next((app for app in APPLICATIONS if app in hits), None)
+        return parameter_type, application
+    
     def generate_response(self, question: str) -> ChatResponse:
         """Generate enhanced response to a question"""
         question_lower = question.lower()
+        self.request_stats['requests'] += 1
         
-        # Try AI-based matching first
-        best_match, similarity = self._find_best_match_ai(question)
+        # Keyword classification first; the encoder is only needed when no parameter is named outright
+        parameter_type, application = self._classify_question(question_lower)
         
-        if best_match and similarity > 0.3:
-            # Determine parameter type and application
-            parameter_type = None
-            application = None
-            
-            if 'illuminance' in question_lower:
-                parameter_type = 'illuminance'
-            elif 'ugr' in question_lower:
-                parameter_type = 'ugr'
-            elif 'cri' in question_lower:
-                parameter_type = 'cri'
-            elif 'power' in question_lower and 'density' in question_lower:
-                parameter_type = 'power_density'
-            elif 'uniformity' in question_lower:
-                parameter_type = 'uniformity'
-            
-            # Determine application
-            if 'office' in question_lower:
-                application = 'office'
-            elif 'conference' in question_lower:
-                application = 'conference'
-            elif 'corridor' in question_lower:
-                application = 'corridor'
-            elif 'reception' in question_lower:
-                application = 'reception'
-            
-            # Generate enhanced answer
-            if parameter_type:
-                result = self._generate_enhanced_answer(question, parameter_type, application)
-                return ChatResponse(**result)
+        if parameter_type:
+            self.request_stats['encoder_skipped'] += 1
+        else:
+            # Fall back to AI-based matching against the known questions
+            best_match, similarity = self._find_best_match_ai(question)
+            if best_match and similarity > 0.3:
+                parameter_type, matched_application = self._classify_question(best_match.lower())
+                application = application or matched_application
+        
+        # Generate enhanced answer
+        if parameter_type:
+            result = self._answer_cache.get((parameter_type, application)) or self._answer_cache[(parameter_type, None)]
+            return ChatResponse(**result)
         
         # Fallback to basic response
         return ChatResponse(
@@ -336,8 +437,10 @@ class EnhancedStandardsChatBot:
             extracted_data=None
         )
 
-# Initialize the enhanced chat bot
-chat_bot = EnhancedStandardsChatBot()
+@app.on_event("startup")
+async def startup():
+    """Initialize the enhanced chat bot once the server starts"""
+    app.state.chat_bot = EnhancedStandardsChatBot()
 
 @app.get("/")
 async def root():
@@ -355,6 +458,7 @@ async def root():
             "/chat": "POST - Send a message to the chat bot",
             "/standards": "GET - List available standards",
             "/parameters": "GET - List extracted parameters",
+            "/stats": "GET - Request statistics",
             "/help": "GET - Get help on how to use the API"
         }
     }
@@ -363,7 +467,7 @@ async def root():
 async def chat(message: ChatMessage):
     """Enhanced chat endpoint"""
     try:
-        response = chat_bot.generate_response(message.message)
+        response = app.state.chat_bot.generate_response(message.message)
         return response
     except Exception as e:
         logger.error(f"Error in chat endpoint: {e}")
@@ -373,16 +477,25 @@ async def chat(message: ChatMessage):
 async def get_standards():
     """Get list of available standards"""
     return {
-        "standards": list(chat_bot.standards_data.keys()),
-        "total_standards": len(chat_bot.standards_data)
+        "standards": list(app.state.chat_bot.standards_data.keys()),
+        "total_standards": len(app.state.chat_bot.standards_data)
     }
 
 @app.get("/parameters")
 async def get_parameters():
     """Get extracted parameters from standards"""
     return {
-        "parameters": list(chat_bot.extracted_parameters.keys()),
-        "extracted_data": chat_bot.extracted_parameters
+        "parameters": list(app.state.chat_bot.extracted_parameters.keys()),
+        "extracted_data": app.state.chat_bot.extracted_parameters
+    }
+
+@app.get("/stats")
+async def get_stats():
+    """Get request statistics"""
+    stats = app.state.chat_bot.request_stats
+    return {
+        **stats,
+        "encoder_skip_rate": stats['encoder_skipped'] / stats['requests'] if stats['requests'] else 0.0
     }
 
 @app.get("/help")
@@ -3,22 +3,114 @@ PDF Study Analyzer
 Advanced system for analyzing lighting studies from PDFs with high accuracy
 """
 import json
+import os
+import hashlib
 import re
 from pathlib import Path
-from typing import Dict, List, Any, Optional, Tuple
+from typing import Dict, List, Any, Optional, Tuple, Union
 import logging
+from dataclasses import dataclass
 from datetime import datetime
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import lru_cache
 import fitz  # PyMuPDF
 import pdfplumber
 from pdfminer.high_level import extract_text
-import numpy as np
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Optional dependency for faster JSON output
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# Optional dependency for multi-pattern prefiltering
+try:
+    import hyperscan
+    HYPERSCAN_AVAILABLE = True
+except ImportError:
+    HYPERSCAN_AVAILABLE = False
+
+# Version of the analysis output; bump when extraction or the result schema changes
+# so stored analyses from older versions are not reused
+ANALYSIS_VERSION = 2
+
+# Parameter types collected by structured extraction
+_STRUCTURED_PARAMETERS = ('illuminance', 'ugr', 'cri', 'uniformity', 'power_density')
+
+# Words at least one of which must appear for the room / luminaire patterns to match
+_ROOM_KEYWORDS = ('room', 'space', 'area')
+_LUMINAIRE_KEYWORDS = ('luminaire', 'fitting', 'fixture', 'm²', 'm2', 'lumens', 'efficacy', 'color', 'temperature', 'cct')
+
+# Room section headings such as "Room: Main Office"; name length is bounded to avoid backtracking on long lines
+_ROOM_SECTION_RE = re.compile(r'(?:room|space|area)[:\s]*([A-Za-z][A-Za-z\s]{1,64}?)(?:\n|$)', re.IGNORECASE)
+
+def _compile_hyperscan(sources: List[str]):
+    """Compile patterns into one Hyperscan database reporting each pattern id at most once"""
+    if not HYPERSCAN_AVAILABLE:
+        return None
+    try:
+        flags = hyperscan.HS_FLAG_CASELESS | hyperscan.HS_FLAG_UTF8 | hyperscan.HS_FLAG_UCP | hyperscan.HS_FLAG_SINGLEMATCH
+        db = hyperscan.Database()
+        db.compile(
+            expressions=[p.encode('utf-8') for p in sources],
+            ids=list(range(len(sources))),
+            elements=len(sources),
+            flags=[flags] * len(sources)
+        )
+        return db
+    except Exception as e:
+        logger.warning(f"Could not compile Hyperscan database: {e}")
+        return None
+
+def _hyperscan_hits(db, text_bytes: bytes) -> frozenset:
+    """Ids of the patterns that match anywhere in the text"""
+    hits = set()
+    
+    def on_match(pattern_id, start, end, flags, context):
+        hits.add(pattern_id)
+    
+    db.scan(text_bytes, match_event_handler=on_match)
+    return frozenset(hits)
+
+def _tagged_alternation(entries: Tuple[Tuple[str, int, str], ...]) -> str:
+    """Join (param_type, pattern_id, source) entries into one alternation with <param_type>__<id> groups"""
+    return '|'.join(f'(?P<{param_type}__{i}>{source})' for param_type, i, source in entries)
+
+@lru_cache(maxsize=256)
+def _master_subset(entries: Tuple[Tuple[str, int, str], ...], entry_ids: frozenset):
+    """Master alternation restricted to the given entries, keeping their group names"""
+    return re.compile(_tagged_alternation(tuple(entries[k] for k in sorted(entry_ids))), re.IGNORECASE)
+
+@dataclass
+class Finding:
+    """A value matched in the study text; its context is only built when serialized"""
+    __slots__ = ('value', 'start', 'end', 'pattern_id', 'confidence')
+    value: Union[int, float]
+    start: int
+    end: int
+    pattern_id: int
+    confidence: float
+    
+    def to_json(self, context: str) -> Dict:
+        """Convert to the JSON form stored in analysis results"""
+        return {
+            'value': self.value,
+            'context': context,
+            'pattern_id': self.pattern_id,
+            'confidence': self.confidence
+        }
+
 class PDFStudyAnalyzer:
     """Advanced PDF study analyzer for lighting reports"""
     
+    # Standards reference data per file, keyed by path with the file mtime it was loaded at
+    _standards_cache: Dict[Path, Tuple[Optional[float], Dict]] = {}
+    
     def __init__(self):
         self.uploads_dir = Path("uploads")
         self.studies_dir = Path("studies")
@@ -26,13 +118,17 @@ class PDFStudyAnalyzer:
         
         # Enhanced extraction patterns
         self.patterns = self._initialize_patterns()
+        self._master = self._initialize_master_pattern()
         
         # Standards reference data
-        self.standards_data = self._load_standards_reference()
+        self.standards_data = self._standards(self.uploads_dir / "enhanced_standards_data.json")
+        self._thresholds = self._compliance_thresholds()
     
-    def _initialize_patterns(self):
-        """Initialize comprehensive extraction patterns"""
-        return {
+    @classmethod
+    @lru_cache(maxsize=1)
+    def _initialize_patterns(cls):
+        """Initialize comprehensive extraction patterns, compiled once as (compiled, source) pairs"""
+        patterns = {
             'illuminance': {
                 'patterns': [
                     # Standard illuminance patterns
@@ -99,10 +195,10 @@ class PDFStudyAnalyzer:
             
             'rooms': {
                 'patterns': [
-                    r'(?:room|space|area)[:\s]*([A-Za-z\s]+?)(?:\s*\d+|\s*lux|\s*UGR|\s*CRI)',
-                    r'([A-Za-z\s]+?)\s*(?:office|room|space|area|zone)',
+                    r'(?:room|space|area)[:\s]*([A-Za-z\s]{1,64}?)(?:\s*\d+|\s*lux|\s*UGR|\s*CRI)',
+                    r'([A-Za-z\s]{1,64}?)\s*(?:office|room|space|area|zone)',
                     r'(?:office|conference|meeting|corridor|reception|lobby|staircase|break|kitchen|toilet|storage)',
-                    r'([A-Za-z\s]+?)\s*(?:\d+\s*lux|\d+\s*UGR|\d+\s*CRI)'
+                    r'([A-Za-z\s]{1,64}?)\s*(?:\d+\s*lux|\d+\s*UGR|\d+\s*CRI)'
                 ],
                 'context_keywords': ['room', 'space', 'area', 'zone', 'office', 'conference', 'meeting']
             },
@@ -119,12 +215,49 @@ class PDFStudyAnalyzer:
                 'context_keywords': ['luminaire', 'fitting', 'fixture', 'watt', 'efficacy', 'color temperature']
             }
         }
+        
+        for config in patterns.values():
+            sources = config['patterns']
+            config['patterns'] = [(re.compile(p, re.IGNORECASE), p) for p in sources]
+            config['sources'] = tuple(sources)
+            config['context_keywords_lower'] = tuple(k.lower() for k in config['context_keywords'])
+        return patterns
+    
+    @classmethod
+    @lru_cache(maxsize=1)
+    def _initialize_master_pattern(cls) -> Dict:
+        """Build one tagged alternation over the patterns of every structured parameter type"""
+        patterns = cls._initialize_patterns()
+        entries = tuple(
+            (param_type, i, source)
+            for param_type in _STRUCTURED_PARAMETERS if param_type in patterns
+            for i, source in enumerate(patterns[param_type]['sources'])
+        )
+        return {
+            'entries': entries,
+            'regex': re.compile(_tagged_alternation(entries), re.IGNORECASE),
+            'hs_db': _compile_hyperscan([source for _, _, source in entries])
+        }
+    
+    @classmethod
+    def _standards(cls, enhanced_file: Path) -> Dict:
+        """Get standards reference data, reloading only when the file changes"""
+        try:
+            mtime = enhanced_file.stat().st_mtime
+        except OSError:
+            mtime = None
+        
+        cached = cls._standards_cache.get(enhanced_file)
+        if cached is None or cached[0] != mtime:
+            cached = (mtime, cls._load_standards_reference(enhanced_file))
+            cls._standards_cache[enhanced_file] = cached
+        return cached[1]
     
-    def _load_standards_reference(self):
+    @staticmethod
+    def _load_standards_reference(enhanced_file: Path):
         """Load standards reference data for comparison"""
         try:
             # Load enhanced standards data if available
-            enhanced_file = self.uploads_dir / "enhanced_standards_data.json"
             if enhanced_file.exists():
                 with open(enhanced_file, 'r', encoding='utf-8') as f:
                     return json.load(f)
@@ -151,17 +284,18 @@ class PDFStudyAnalyzer:
         """Analyze a PDF lighting study with high accuracy"""
         logger.info(f"Analyzing PDF study: {pdf_path.name}")
         
-        # Extract text using multiple methods
-        text_content = self._extract_text_comprehensive(pdf_path)
+        # Extract text using multiple methods, reusing previously extracted text when cached
+        text_content = self._extract_and_cache(pdf_path)
+        text_lower = text_content.lower()
         
         # Extract structured data
-        extracted_data = self._extract_structured_data(text_content)
+        extracted_data = self._extract_structured_data(text_content, text_lower)
         
         # Extract room-specific data
-        room_data = self._extract_room_data(text_content)
+        room_data = self._extract_room_data(text_content, text_lower)
         
         # Extract luminaire data
-        luminaire_data = self._extract_luminaire_data(text_content)
+        luminaire_data = self._extract_luminaire_data(text_content, text_lower)
         
         # Analyze compliance
         compliance_analysis = self._analyze_compliance(extracted_data, room_data)
@@ -169,138 +303,202 @@ class PDFStudyAnalyzer:
         # Generate summary
         summary = self._generate_study_summary(extracted_data, room_data, compliance_analysis)
         
+        # Build match contexts now that findings are serialized
+        extracted_json = {
+            param_type: [
+                finding.to_json(self._extract_context(text_content, finding.start, finding.end))
+                for finding in findings
+            ]
+            for param_type, findings in extracted_data.items()
+        }
+        
+        # Keep only the first 5000 chars for reference so the full text can be released
+        text_preview = text_content[:5000]
+        del text_content, text_lower, extracted_data
+        
         # Save analysis results
         analysis_result = {
             "file_name": pdf_path.name,
             "analysis_date": datetime.now().isoformat(),
-            "extracted_data": extracted_data,
+            "extracted_data": extracted_json,
+            "pattern_table": {
+                param_type: list(self.patterns[param_type]['sources'])
+                for param_type in extracted_json if param_type in self.patterns
+            },
             "room_data": room_data,
             "luminaire_data": luminaire_data,
             "compliance_analysis": compliance_analysis,
             "summary": summary,
-            "text_content": text_content[:5000]  # First 5000 chars for reference
+            "text_content": text_preview
         }
         
         # Save to studies directory
         output_file = self.studies_dir / f"{pdf_path.stem}_analysis.json"
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(analysis_result, f, indent=2, ensure_ascii=False)
+        if ORJSON_AVAILABLE:
+            output_file.write_bytes(orjson.dumps(analysis_result, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+        else:
+            with open(output_file, 'w', encoding='utf-8') as f:
+                json.dump(analysis_result, f, indent=2, ensure_ascii=False)
         
         logger.info(f"Analysis saved to: {output_file}")
         return analysis_result
     
-    def _extract_text_comprehensive(self, pdf_path: Path) -> str:
-        """Extract text using multiple methods for better accuracy"""
-        text_content = ""
+    def _text_cache_key(self, pdf_path: Path) -> Tuple[Path, str]:
+        """Cache file and validity key (analysis version, resolved path, size, mtime) for a PDF's extracted text"""
+        resolved = pdf_path.resolve()
+        stat = resolved.stat()
+        path_digest = hashlib.md5(str(resolved).encode('utf-8')).hexdigest()[:12]
+        cache_key = f"v{ANALYSIS_VERSION}|{resolved}|{stat.st_size}|{stat.st_mtime_ns}"
+        return self.studies_dir / f"{pdf_path.stem}_{path_digest}.txt", cache_key
+    
+    def _extract_and_cache(self, pdf_path: Path) -> str:
+        """Return the PDF's text from a cache file whose stored key still matches, extracting and caching it otherwise"""
+        text_path, cache_key = self._text_cache_key(pdf_path)
+        if text_path.exists():
+            stored_key, _, cached_text = text_path.read_text(encoding='utf-8').partition('\n')
+            if stored_key == cache_key:
+                return cached_text
         
         try:
-            # Method 1: PyMuPDF (best for most PDFs)
-            doc = fitz.open(pdf_path)
-            for page in doc:
-                text_content += page.get_text() + "\n"
-            doc.close()
-            
-            # Method 2: pdfplumber (better for tables)
-            with pdfplumber.open(pdf_path) as pdf:
-                for page in pdf.pages:
-                    text_content += page.extract_text() or ""
-            
-            # Method 3: pdfminer (fallback)
-            if len(text_content) < 100:
-                text_content = extract_text(pdf_path)
-                
+            text_content = self._extract_text_comprehensive(pdf_path)
         except Exception as e:
+            # A failed extraction is not cached, so the next run tries again
             logger.error(f"Error extracting text: {e}")
+            return ""
         
+        # Write through a temporary file so a concurrent reader never sees a partial cache entry
+        temp_path = text_path.with_suffix('.txt.tmp')
+        temp_path.write_text(f"{cache_key}\n{text_content}", encoding='utf-8')
+        temp_path.replace(text_path)
         return text_content
     
-    def _extract_structured_data(self, text: str) -> Dict:
-        """Extract structured lighting data from text"""
-        extracted = {
-            'illuminance': [],
-            'ugr': [],
-            'cri': [],
-            'uniformity': [],
-            'power_density': []
-        }
+    def _extract_text_comprehensive(self, pdf_path: Path) -> str:
+        """Extract text with PyMuPDF, falling back to slower extractors only if it finds little text; raises on failure"""
+        # Method 1: PyMuPDF (best for most PDFs), keeping only text blocks in the page body
+        # so headers, footers and page numbers don't produce spurious matches
+        doc = fitz.open(pdf_path)
+        pages = [""] * doc.page_count
+        for i, page in enumerate(doc):
+            page_height = page.rect.height
+            body = [
+                block[4] for block in page.get_text("blocks", flags=fitz.TEXT_PRESERVE_WHITESPACE)
+                if block[6] == 0 and 0.05 * page_height < block[1] < 0.95 * page_height
+            ]
+            pages[i] = "\n".join(body)
+        doc.close()
+        text_content = "\n".join(pages)
+        
+        # Method 2: pdfplumber (better for tables)
+        if len(text_content) < 100:
+            chunks: List[str] = []
+            with pdfplumber.open(pdf_path) as pdf:
+                for page in pdf.pages:
+                    chunks.append(page.extract_text() or "")
+            plumber_text = "\n".join(chunks)
+            if len(plumber_text) > len(text_content):
+                text_content = plumber_text
+        
+        # Method 3: pdfminer (fallback)
+        if len(text_content) < 100:
+            text_content = extract_text(pdf_path)
         
-        for param_type, config in self.patterns.items():
-            if param_type in extracted:
-                for pattern in config['patterns']:
-                    matches = re.finditer(pattern, text, re.IGNORECASE)
-                    for match in matches:
-                        groups = match.groups()
-                        if groups:
-                            value = float(groups[0]) if '.' in groups[0] else int(groups[0])
-                            extracted[param_type].append({
-                                'value': value,
-                                'context': self._extract_context(text, match.start(), match.end()),
-                                'pattern': pattern,
-                                'confidence': self._calculate_extraction_confidence(match, config['context_keywords'])
-                            })
+        return text_content
+    
+    def _extract_structured_data(self, text: str, text_lower: str) -> Dict[str, List[Finding]]:
+        """Extract structured lighting data from text"""
+        extracted = {param_type: [] for param_type in _STRUCTURED_PARAMETERS}
+        
+        master = self._master
+        regex = master['regex']
+        if master['hs_db'] is not None:
+            # Hyperscan finds which patterns occur at all; only those are run through re
+            hits = _hyperscan_hits(master['hs_db'], text.encode('utf-8'))
+            if not hits:
+                regex = None
+            elif len(hits) < len(master['entries']):
+                regex = _master_subset(master['entries'], hits)
+        
+        # One scan for all parameter types; the group name <param_type>__<id> tells which pattern matched
+        if regex is not None:
+            for match in regex.finditer(text):
+                param_type, pattern_id = match.lastgroup.split('__', 1)
+                raw_value = match.group(match.lastindex + 1)
+                value = float(raw_value) if '.' in raw_value else int(raw_value)
+                start, end = match.span()
+                extracted[param_type].append(Finding(
+                    value,
+                    start,
+                    end,
+                    int(pattern_id),
+                    self._calculate_extraction_confidence(
+                        text_lower, start, end, self.patterns[param_type]['context_keywords_lower']
+                    )
+                ))
         
         return extracted
     
-    def _extract_room_data(self, text: str) -> List[Dict]:
+    def _extract_room_data(self, text: str, text_lower: str) -> List[Dict]:
         """Extract room-specific lighting data"""
         rooms = []
+        if not any(keyword in text_lower for keyword in _ROOM_KEYWORDS):
+            return rooms
+        room_positions = {}
         
         # Look for room sections
-        room_sections = re.finditer(r'(?:room|space|area)[:\s]*([A-Za-z\s]+?)(?:\n|$)', text, re.IGNORECASE)
+        room_sections = _ROOM_SECTION_RE.finditer(text)
         
         for section in room_sections:
             room_name = section.group(1).strip()
             if len(room_name) > 2:  # Filter out very short matches
+                if room_name not in room_positions:
+                    room_positions[room_name] = text_lower.find(room_name.lower())
+                room_context = self._find_room_context(text, room_positions[room_name], room_name)
+                
                 # Extract data for this room
                 room_data = {
                     'name': room_name,
-                    'illuminance': self._extract_room_parameter(text, room_name, 'illuminance'),
-                    'ugr': self._extract_room_parameter(text, room_name, 'ugr'),
-                    'cri': self._extract_room_parameter(text, room_name, 'cri'),
-                    'uniformity': self._extract_room_parameter(text, room_name, 'uniformity')
+                    'illuminance': self._extract_room_parameter(room_context, 'illuminance'),
+                    'ugr': self._extract_room_parameter(room_context, 'ugr'),
+                    'cri': self._extract_room_parameter(room_context, 'cri'),
+                    'uniformity': self._extract_room_parameter(room_context, 'uniformity')
                 }
                 rooms.append(room_data)
         
         return rooms
     
-    def _extract_room_parameter(self, text: str, room_name: str, parameter: str) -> Optional[Dict]:
-        """Extract specific parameter for a room"""
-        # Look for parameter near room name
-        room_context = self._find_room_context(text, room_name)
+    def _extract_room_parameter(self, room_context: Optional[str], parameter: str) -> Optional[Dict]:
+        """Extract specific parameter from the context around a room"""
         if room_context:
-            patterns = self.patterns.get(parameter, {}).get('patterns', [])
-            for pattern in patterns:
-                matches = re.finditer(pattern, room_context, re.IGNORECASE)
-                for match in matches:
-                    groups = match.groups()
-                    if groups:
-                        value = float(groups[0]) if '.' in groups[0] else int(groups[0])
-                        return {
-                            'value': value,
-                            'context': room_context,
-                            'confidence': 0.8
-                        }
+            # Patterns are tried in priority order, so the most specific phrasing wins over the earliest number
+            for compiled, _ in self.patterns.get(parameter, {}).get('patterns', []):
+                match = compiled.search(room_context)
+                if match and match.groups():
+                    raw_value = match.group(1)
+                    value = float(raw_value) if '.' in raw_value else int(raw_value)
+                    return {
+                        'value': value,
+                        'context': room_context,
+                        'confidence': 0.8
+                    }
         return None
     
-    def _find_room_context(self, text: str, room_name: str, context_length: int = 500) -> Optional[str]:
-        """Find context around room name"""
-        try:
-            index = text.lower().find(room_name.lower())
-            if index != -1:
-                start = max(0, index - context_length)
-                end = min(len(text), index + len(room_name) + context_length)
-                return text[start:end]
-        except:
-            pass
+    def _find_room_context(self, text: str, index: int, room_name: str, context_length: int = 500) -> Optional[str]:
+        """Find context around the room name found at index"""
+        if index != -1:
+            start = max(0, index - context_length)
+            end = min(len(text), index + len(room_name) + context_length)
+            return text[start:end]
         return None
     
-    def _extract_luminaire_data(self, text: str) -> List[Dict]:
+    def _extract_luminaire_data(self, text: str, text_lower: str) -> List[Dict]:
         """Extract luminaire specifications"""
         luminaires = []
+        if not any(keyword in text_lower for keyword in _LUMINAIRE_KEYWORDS):
+            return luminaires
         
         patterns = self.patterns['luminaire_data']['patterns']
-        for pattern in patterns:
-            matches = re.finditer(pattern, text, re.IGNORECASE)
+        for compiled, pattern in patterns:
+            matches = compiled.finditer(text)
             for match in matches:
                 groups = match.groups()
                 if groups:
@@ -327,6 +525,17 @@ class PDFStudyAnalyzer:
         else:
             return 'unknown'
     
+    def _compliance_thresholds(self) -> Dict:
+        """Flatten the office reference limits used by the compliance checks"""
+        standards_ref = self.standards_data.get('en12464_2021', {}).get('applications', {}).get('office_general', {})
+        illuminance_ref = standards_ref.get('illuminance', {})
+        return {
+            'illum_min': illuminance_ref.get('minimum', 300),
+            'illum_max': illuminance_ref.get('maximum', 1000),
+            'ugr_max': 19,
+            'cri_min': 80
+        }
+    
     def _analyze_compliance(self, extracted_data: Dict, room_data: List[Dict]) -> Dict:
         """Analyze compliance with standards"""
         compliance = {
@@ -353,70 +562,72 @@ class PDFStudyAnalyzer:
     
     def _analyze_room_compliance(self, room: Dict) -> Dict:
         """Analyze compliance for a specific room"""
-        room_name = room['name']
+        thresholds = self._thresholds
+        issues = []
+        recommendations = []
         compliance = {
-            'room_name': room_name,
+            'room_name': room['name'],
             'status': 'unknown',
-            'issues': [],
-            'recommendations': []
+            'issues': issues,
+            'recommendations': recommendations
         }
         
         # Check illuminance
-        if room.get('illuminance'):
-            illuminance = room['illuminance']['value']
-            if illuminance < 300:
-                compliance['issues'].append(f"Illuminance too low: {illuminance} lux (minimum 300 lux)")
-            elif illuminance > 1000:
-                compliance['issues'].append(f"Illuminance too high: {illuminance} lux (maximum 1000 lux)")
+        illuminance_data = room.get('illuminance')
+        if illuminance_data:
+            illuminance = illuminance_data['value']
+            if illuminance < thresholds['illum_min']:
+                issues.append(f"Illuminance too low: {illuminance} lux (minimum {thresholds['illum_min']} lux)")
+            elif illuminance > thresholds['illum_max']:
+                issues.append(f"Illuminance too high: {illuminance} lux (maximum {thresholds['illum_max']} lux)")
             else:
-                compliance['recommendations'].append(f"Good illuminance: {illuminance} lux")
+                recommendations.append(f"Good illuminance: {illuminance} lux")
         
         # Check UGR
-        if room.get('ugr'):
-            ugr = room['ugr']['value']
-            if ugr > 19:
-                compliance['issues'].append(f"UGR too high: {ugr} (maximum 19)")
+        ugr_data = room.get('ugr')
+        if ugr_data:
+            ugr = ugr_data['value']
+            if ugr > thresholds['ugr_max']:
+                issues.append(f"UGR too high: {ugr} (maximum {thresholds['ugr_max']})")
             else:
-                compliance['recommendations'].append(f"Good UGR: {ugr}")
+                recommendations.append(f"Good UGR: {ugr}")
         
         # Check CRI
-        if room.get('cri'):
-            cri = room['cri']['value']
-            if cri < 80:
-                compliance['issues'].append(f"CRI too low: {cri} (minimum 80)")
+        cri_data = room.get('cri')
+        if cri_data:
+            cri = cri_data['value']
+            if cri < thresholds['cri_min']:
+                issues.append(f"CRI too low: {cri} (minimum {thresholds['cri_min']})")
             else:
-                compliance['recommendations'].append(f"Good CRI: {cri}")
+                recommendations.append(f"Good CRI: {cri}")
         
         # Determine status
-        if compliance['issues']:
+        if issues:
             compliance['status'] = 'non_compliant'
-        elif compliance['recommendations']:
+        elif recommendations:
             compliance['status'] = 'compliant'
         else:
             compliance['status'] = 'unknown'
         
         return compliance
     
-    def _analyze_parameter_compliance(self, param_type: str, values: List[Dict]) -> Dict:
+    def _analyze_parameter_compliance(self, param_type: str, values: List[Finding]) -> Dict:
         """Analyze compliance for a specific parameter"""
         if not values:
             return {'status': 'no_data', 'confidence': 0.0}
         
-        # Get standards reference
-        standards_ref = self.standards_data.get('en12464_2021', {}).get('applications', {}).get('office_general', {})
-        
         if param_type == 'illuminance':
-            min_required = standards_ref.get('illuminance', {}).get('minimum', 300)
-            max_required = standards_ref.get('illuminance', {}).get('maximum', 1000)
+            min_required = self._thresholds['illum_min']
+            max_required = self._thresholds['illum_max']
             
-            compliant_values = [v for v in values if min_required <= v['value'] <= max_required]
-            compliance_rate = len(compliant_values) / len(values) if values else 0
+            compliant_count = sum(1 for f in values if min_required <= f.value <= max_required)
+            compliance_rate = compliant_count / len(values) if values else 0
             
             return {
                 'status': 'compliant' if compliance_rate > 0.8 else 'non_compliant',
                 'compliance_rate': compliance_rate,
                 'values_analyzed': len(values),
-                'compliant_values': len(compliant_values)
+                'compliant_values': compliant_count
             }
         
         return {'status': 'analyzed', 'confidence': 0.5}
@@ -431,8 +642,9 @@ class PDFStudyAnalyzer:
         if not all_statuses:
             return 'no_data'
         
-        compliant_count = all_statuses.count('compliant')
-        non_compliant_count = all_statuses.count('non_compliant')
+        status_counts = Counter(all_statuses)
+        compliant_count = status_counts['compliant']
+        non_compliant_count = status_counts['non_compliant']
         
         if non_compliant_count > compliant_count:
             return 'non_compliant'
@@ -452,16 +664,17 @@ class PDFStudyAnalyzer:
         }
         
         # Generate key findings
-        if extracted_data['illuminance']:
-            avg_illuminance = np.mean([v['value'] for v in extracted_data['illuminance']])
+        illuminance_values = extracted_data['illuminance']
+        if illuminance_values:
+            avg_illuminance = sum(f.value for f in illuminance_values) / len(illuminance_values)
             summary['key_findings'].append(f"Average illuminance: {avg_illuminance:.1f} lux")
         
         if extracted_data['ugr']:
-            max_ugr = max([v['value'] for v in extracted_data['ugr']])
+            max_ugr = max(f.value for f in extracted_data['ugr'])
             summary['key_findings'].append(f"Maximum UGR: {max_ugr}")
         
         if extracted_data['cri']:
-            min_cri = min([v['value'] for v in extracted_data['cri']])
+            min_cri = min(f.value for f in extracted_data['cri'])
             summary['key_findings'].append(f"Minimum CRI: {min_cri}")
         
         # Generate recommendations
@@ -482,39 +695,45 @@ class PDFStudyAnalyzer:
         except:
             return ""
     
-    def _calculate_extraction_confidence(self, match, context_keywords: List[str]) -> float:
-        """Calculate confidence in extraction based on context"""
-        base_confidence = 0.5
-        
-        # Increase confidence if context keywords are nearby
-        context = self._extract_context(match.string, match.start(), match.end())
-        context_lower = context.lower()
-        
-        for keyword in context_keywords:
-            if keyword.lower() in context_lower:
-                base_confidence += 0.1
-        
-        return min(base_confidence, 0.95)
+    def _calculate_extraction_confidence(self, text_lower: str, start: int, end: int,
+                                         keywords_lower: Tuple[str, ...], context_length: int = 200) -> float:
+        """Calculate confidence in extraction based on context in the lowercased text"""
+        # Increase confidence by 0.1 for each context keyword nearby
+        context_lower = text_lower[max(0, start - context_length):end + context_length]
+        hits = sum(1 for keyword in keywords_lower if keyword in context_lower)
+        
+        return min(0.5 + 0.1 * hits, 0.95)
+
+_worker_analyzer = None
+
+def _analyze_one(pdf_path: Path) -> Dict:
+    """Analyze a single PDF with an analyzer created once per worker process"""
+    global _worker_analyzer
+    if _worker_analyzer is None:
+        _worker_analyzer = PDFStudyAnalyzer()
+    return _worker_analyzer.analyze_pdf_study(pdf_path)
 
 def main():
     """Main function for testing"""
-    analyzer = PDFStudyAnalyzer()
-    
     # Test with existing PDFs
     base_dir = Path("base")
     if base_dir.exists():
         pdf_files = list(base_dir.glob("*.pdf"))
         if pdf_files:
             print(f"Found {len(pdf_files)} PDF files to analyze")
-            for pdf_file in pdf_files:
-                print(f"\nAnalyzing: {pdf_file.name}")
-                try:
-                    result = analyzer.analyze_pdf_study(pdf_file)
-                    print(f"✅ Analysis completed for {pdf_file.name}")
-                    print(f"   Rooms analyzed: {result['summary']['total_rooms_analyzed']}")
-                    print(f"   Overall compliance: {result['summary']['overall_compliance']}")
-                except Exception as e:
-                    print(f"❌ Error analyzing {pdf_file.name}: {e}")
+            with ProcessPoolExecutor(max_workers=min(os.cpu_count() or 1, 4)) as executor:
+                # Extracted text is cached next to the analyses, so re-runs skip PDF parsing
+                futures = {executor.submit(_analyze_one, pdf_file): pdf_file for pdf_file in pdf_files}
+                for future in as_completed(futures):
+                    pdf_file = futures[future]
+                    print(f"\nAnalyzing: {pdf_file.name}")
+                    try:
+                        result = future.result()
+                        print(f"✅ Analysis completed for {pdf_file.name}")
+                        print(f"   Rooms analyzed: {result['summary']['total_rooms_analyzed']}")
+                        print(f"   Overall compliance: {result['summary']['overall_compliance']}")
+                    except Exception as e:
+                        print(f"❌ Error analyzing {pdf_file.name}: {e}")
         else:
             print("No PDF files found in base/ directory")
     else:
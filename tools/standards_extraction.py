@@ -0,0 +1,66 @@
+"""
+Standards Parameter Extraction
+Regex extraction of lighting parameters from standards text, kept free of heavy
+dependencies so process-pool workers can import it cheaply
+"""
+import re
+from typing import Dict, List
+
+# Patterns for extracting parameter values from standards text, compiled once per process
+STANDARDS_PATTERNS = {
+    'illuminance': [
+        r'(\d+)\s*lux\s*(?:minimum|min|≥|>=)',
+        r'(?:minimum|min|≥|>=)\s*(\d+)\s*lux',
+        r'illuminance[:\s]*(\d+)\s*lux',
+        r'(\d+)\s*lx\s*(?:minimum|min|≥|>=)',
+        r'(?:minimum|min|≥|>=)\s*(\d+)\s*lx'
+    ],
+    'ugr': [
+        r'UGR[:\s]*(?:≤|<=|maximum|max)\s*(\d+)',
+        r'(?:≤|<=|maximum|max)\s*(\d+)\s*UGR',
+        r'glare[:\s]*(?:≤|<=|maximum|max)\s*(\d+)'
+    ],
+    'cri': [
+        r'CRI[:\s]*(?:≥|>=|minimum|min)\s*(\d+)',
+        r'(?:≥|>=|minimum|min)\s*(\d+)\s*CRI',
+        r'color rendering[:\s]*(?:≥|>=|minimum|min)\s*(\d+)'
+    ]
+}
+COMPILED_STANDARDS_PATTERNS = {
+    parameter_type: [re.compile(pattern, re.IGNORECASE) for pattern in patterns]
+    for parameter_type, patterns in STANDARDS_PATTERNS.items()
+}
+
+def extract_parameters_from_document(doc_name: str, text_content: str) -> Dict[str, List[Dict]]:
+    """Extract lighting parameters from a single standards document"""
+    parameters = {}
+    text_lower = text_content.lower()
+    
+    for parameter_type, patterns in COMPILED_STANDARDS_PATTERNS.items():
+        for pattern in patterns:
+            for match in pattern.findall(text_content):
+                parameters.setdefault(parameter_type, []).append({
+                    'value': int(match),
+                    'source': doc_name,
+                    'context': extract_context(text_content, text_lower, match)
+                })
+    
+    return parameters
+
+def extract_context(text: str, text_lower: str, match: str, context_length: int = 100) -> str:
+    """Extract context around a match"""
+    try:
+        index = text_lower.find(match.lower())
+        if index != -1:
+            text_length = len(text)
+            start = max(0, index - context_length)
+            end = min(text_length, index + len(match) + context_length)
+            # Trim whitespace by index so only the final slice is allocated
+            while start < end and text[start].isspace():
+                start += 1
+            while end > start and text[end - 1].isspace():
+                end -= 1
+            return text[start:end]
+    except:
+        pass
+    return ""
@@ -4,11 +4,18 @@ Simple interface to upload and analyze PDF lighting studies
 """
 import streamlit as st
 import json
+import hashlib
+from functools import lru_cache, partial
 from pathlib import Path
-from pdf_study_analyzer import PDFStudyAnalyzer
-import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
+from typing import Dict
+import numpy as np
+
+# Optional dependency for faster JSON output
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
 
 # Configure Streamlit page
 st.set_page_config(
@@ -17,14 +24,323 @@ st.set_page_config(
     layout="wide"
 )
 
+# Heavy modules are imported on first use so the welcome page starts quickly
+@lru_cache(maxsize=None)
+def _pd():
+    """Lazily import pandas"""
+    import pandas as pd
+    return pd
+
+@lru_cache(maxsize=None)
+def _go():
+    """Lazily import plotly.graph_objects"""
+    import plotly.graph_objects as go
+    return go
+
+@lru_cache(maxsize=None)
+def _pyarrow():
+    """Lazily import pyarrow and its compute functions"""
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    return pa, pc
+
+# Working directories shared with PDFStudyAnalyzer
+UPLOADS_DIR = Path("uploads")
+UPLOADS_DIR.mkdir(exist_ok=True)
+STUDIES_DIR = Path("studies")
+STANDARDS_FILE = UPLOADS_DIR / "enhanced_standards_data.json"
+
+def _standards_version() -> str:
+    """Modification time of the standards reference file the analyzer compares against"""
+    try:
+        return str(STANDARDS_FILE.stat().st_mtime_ns)
+    except OSError:
+        return "none"
+
+@st.cache_resource
+def get_analyzer(standards_version: str):
+    """Create the PDF study analyzer once per standards file version and share it across reruns"""
+    from pdf_study_analyzer import PDFStudyAnalyzer
+    return PDFStudyAnalyzer()
+
+def _dump_json(result: Dict) -> bytes:
+    """Serialize an analysis result as indented UTF-8 JSON"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(result, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(result, indent=2, ensure_ascii=False).encode('utf-8')
+
+def _indexed_analysis_path(file_digest: str, standards_version: str) -> Path:
+    """Stored analysis for a PDF, keyed on its contents' MD5, the analyzer version and the standards file version"""
+    from pdf_study_analyzer import ANALYSIS_VERSION
+    return STUDIES_DIR / f"{file_digest}_v{ANALYSIS_VERSION}_{standards_version}.json"
+
+@st.cache_data(show_spinner=False)
+def _analyze(file_digest: str, standards_version: str, file_name: str, _file_path: Path) -> Dict:
+    """Analyze an uploaded PDF, reusing a stored analysis of identical contents"""
+    indexed_file = _indexed_analysis_path(file_digest, standards_version)
+    if indexed_file.exists():
+        with open(indexed_file, 'r', encoding='utf-8') as f:
+            result = json.load(f)
+        # The stored analysis may come from an identical file uploaded under another name
+        result['file_name'] = file_name
+        return result
+    
+    result = get_analyzer(standards_version).analyze_pdf_study(_file_path)
+    result['file_name'] = file_name
+    
+    # Write through a temporary file so other sessions never read a partial index entry
+    temp_file = indexed_file.with_suffix('.json.tmp')
+    temp_file.write_bytes(_dump_json(result))
+    temp_file.replace(indexed_file)
+    return result
+
+@st.cache_data(ttl=60, show_spinner=False)
+def _recent_analyses():
+    """Names of the last 3 saved analyses, rescanned at most once a minute"""
+    return [analysis_file.stem for analysis_file in STUDIES_DIR.glob("*_analysis.json")][-3:]
+
+# Fragments rerun on their own when their widgets change (Streamlit 1.37+); older versions render them inline
+fragment = getattr(st, "fragment", lambda func: func)
+
+# Download buttons accept a callable that builds the file on click (Streamlit 1.49+)
+LAZY_DOWNLOADS = tuple(int(part) for part in st.__version__.split(".")[:2]) >= (1, 49)
+
+def _room_value(room: Dict, parameter: str) -> float:
+    """Numeric value of a room parameter, NaN when it was not found"""
+    return (room.get(parameter) or {}).get('value', np.nan)
+
+def _analysis_json(result: Dict) -> bytes:
+    """Serialize an analysis result as indented JSON, memoized in session state per file and analysis date"""
+    key = (result['file_name'], result['analysis_date'])
+    cached = st.session_state.get('_analysis_json')
+    if cached is not None and cached[0] == key:
+        return cached[1]
+    
+    json_bytes = _dump_json(result)
+    st.session_state['_analysis_json'] = (key, json_bytes)
+    return json_bytes
+
+@st.cache_data(show_spinner=False)
+def _summary_report(file_name: str, analysis_date: str, params_total: int, _result: Dict) -> str:
+    """Build the Markdown summary report, cached per analyzed file and analysis date"""
+    summary = _result['summary']
+    parts = [f"""
+# Lighting Study Analysis Report
+
+## File: {file_name}
+## Analysis Date: {analysis_date}
+
+## Summary
+- **Rooms Analyzed:** {summary['total_rooms_analyzed']}
+- **Overall Compliance:** {summary['overall_compliance']}
+- **Parameters Found:** {params_total}
+
+## Key Findings
+{chr(10).join([f"- {finding}" for finding in summary['key_findings']])}
+
+## Recommendations
+{chr(10).join([f"- {rec}" for rec in summary['recommendations']])}
+
+## Room Analysis
+"""]
+    
+    for room in _result['room_data']:
+        parts.append(f"\n### {room['name']}\n")
+        if room.get('illuminance'):
+            parts.append(f"- Illuminance: {room['illuminance']['value']} lux\n")
+        if room.get('ugr'):
+            parts.append(f"- UGR: {room['ugr']['value']}\n")
+        if room.get('cri'):
+            parts.append(f"- CRI: {room['cri']['value']}\n")
+    return "".join(parts)
+
+@fragment
+def render_summary(result: Dict, params_total: int):
+    """Render summary metrics, key findings and recommendations"""
+    # Display summary
+    st.header("📋 Analysis Summary")
+    
+    col1, col2, col3, col4 = st.columns(4)
+    
+    with col1:
+        st.metric(
+            "Rooms Analyzed",
+            result['summary']['total_rooms_analyzed']
+        )
+    
+    with col2:
+        st.metric(
+            "Parameters Found",
+            params_total
+        )
+    
+    with col3:
+        compliance = result['summary']['overall_compliance']
+        compliance_color = "🟢" if compliance == "compliant" else "🔴" if compliance == "non_compliant" else "🟡"
+        st.metric(
+            "Overall Compliance",
+            f"{compliance_color} {compliance.title()}"
+        )
+    
+    with col4:
+        st.metric(
+            "Analysis Date",
+            result['analysis_date'][:10]
+        )
+    
+    # Display key findings
+    st.header("🔍 Key Findings")
+    st.markdown("\n".join(f"- {finding}" for finding in result['summary']['key_findings']))
+    
+    # Display recommendations
+    st.header("💡 Recommendations")
+    st.markdown("\n".join(f"- {rec}" for rec in result['summary']['recommendations']))
+
+@fragment
+def render_room_analysis(result: Dict):
+    """Render the room table and illuminance/UGR charts"""
+    # Room analysis
+    if result['room_data']:
+        st.header("🏢 Room Analysis")
+        
+        # Collect room values as parallel columns in a single pass
+        names, illuminance, ugr, cri, uniformity = [], [], [], [], []
+        for room in result['room_data']:
+            names.append(room['name'])
+            illuminance.append(_room_value(room, 'illuminance'))
+            ugr.append(_room_value(room, 'ugr'))
+            cri.append(_room_value(room, 'cri'))
+            uniformity.append(_room_value(room, 'uniformity'))
+        
+        names_arr = np.asarray(names, dtype=object)
+        illuminance_arr = np.asarray(illuminance, dtype=np.float32)
+        ugr_arr = np.asarray(ugr, dtype=np.float32)
+        
+        # Create room data table; Arrow-backed float columns reach the browser without conversion
+        pd = _pd()
+        df = pd.DataFrame({
+            'Room': names,
+            'Illuminance (lux)': pd.array(illuminance_arr, dtype='float32[pyarrow]'),
+            'UGR': pd.array(ugr_arr, dtype='float32[pyarrow]'),
+            'CRI': pd.array(np.asarray(cri, dtype=np.float32), dtype='float32[pyarrow]'),
+            'Uniformity': pd.array(np.asarray(uniformity, dtype=np.float32), dtype='float32[pyarrow]')
+        })
+        if hasattr(st, "column_config"):
+            st.dataframe(df, use_container_width=True, column_config={
+                'Illuminance (lux)': st.column_config.NumberColumn(format="%.1f"),
+                'UGR': st.column_config.NumberColumn(format="%.1f"),
+                'CRI': st.column_config.NumberColumn(format="%.1f"),
+                'Uniformity': st.column_config.NumberColumn(format="%.2f")
+            })
+        else:
+            st.dataframe(df, use_container_width=True)
+        
+        # Create visualizations; a chart needs at least two rooms to compare
+        go = _go()
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            # Illuminance chart
+            illuminance_mask = ~np.isnan(illuminance_arr)
+            if np.count_nonzero(illuminance_mask) >= 2:
+                fig = go.Figure(data=[go.Bar(x=names_arr[illuminance_mask], y=illuminance_arr[illuminance_mask])])
+                fig.update_layout(title="Room Illuminance Levels", xaxis_title="Room", yaxis_title="Illuminance (lux)")
+                fig.add_hline(y=500, line_dash="dash", line_color="green", annotation_text="Recommended (500 lux)")
+                fig.add_hline(y=300, line_dash="dash", line_color="orange", annotation_text="Minimum (300 lux)")
+                st.plotly_chart(fig, use_container_width=True)
+        
+        with col2:
+            # UGR chart
+            ugr_mask = ~np.isnan(ugr_arr)
+            if np.count_nonzero(ugr_mask) >= 2:
+                fig = go.Figure(data=[go.Bar(x=names_arr[ugr_mask], y=ugr_arr[ugr_mask])])
+                fig.update_layout(title="Room UGR Levels", xaxis_title="Room", yaxis_title="UGR")
+                fig.add_hline(y=19, line_dash="dash", line_color="red", annotation_text="Maximum (19)")
+                st.plotly_chart(fig, use_container_width=True)
+
+@fragment
+def render_compliance(result: Dict):
+    """Render the compliance table and per-room details"""
+    # Compliance analysis
+    if result['compliance_analysis']['room_compliance']:
+        st.header("✅ Compliance Analysis")
+        
+        room_compliance = result['compliance_analysis']['room_compliance']
+        pa, pc = _pyarrow()
+        statuses = pc.utf8_title(pa.array([room_comp['status'] for room_comp in room_compliance], type=pa.string())).to_pylist()
+        
+        df = _pd().DataFrame({
+            'Room': [room_comp['room_name'] for room_comp in room_compliance],
+            'Status': statuses,
+            'Issues': np.fromiter((len(room_comp['issues']) for room_comp in room_compliance), dtype=np.int32, count=len(room_compliance)),
+            'Recommendations': np.fromiter((len(room_comp['recommendations']) for room_comp in room_compliance), dtype=np.int32, count=len(room_compliance))
+        })
+        st.dataframe(df, use_container_width=True)
+        
+        # Show detailed compliance for each room
+        for room_comp, status in zip(room_compliance, statuses):
+            with st.expander(f"📋 {room_comp['room_name']} - {status}"):
+                if room_comp['issues']:
+                    st.write("**Issues:**")
+                    for issue in room_comp['issues']:
+                        st.write(f"❌ {issue}")
+                
+                if room_comp['recommendations']:
+                    st.write("**Recommendations:**")
+                    for rec in room_comp['recommendations']:
+                        st.write(f"✅ {rec}")
+
+@fragment
+def render_extracted(result: Dict):
+    """Render the extracted parameter values"""
+    # Extracted data
+    st.header("📊 Extracted Data")
+    
+    for param_type, values in result['extracted_data'].items():
+        if values:
+            with st.expander(f"🔍 {param_type.title()} ({len(values)} values found)"):
+                st.markdown("\n\n---\n\n".join(
+                    f"**Value {i+1}:** {value['value']}  \n"
+                    f"**Confidence:** {value['confidence']:.2f}  \n"
+                    f"**Context:** {value['context'][:200]}..."
+                    for i, value in enumerate(values)
+                ))
+
+@fragment
+def render_downloads(result: Dict, params_total: int):
+    """Render the JSON and Markdown download buttons"""
+    # Download results
+    st.header("💾 Download Results")
+    
+    # Build file contents only when a button is clicked where supported
+    if LAZY_DOWNLOADS:
+        json_data = partial(_dump_json, result)
+        summary_report = partial(_summary_report, result['file_name'], result['analysis_date'], params_total, result)
+    else:
+        json_data = _analysis_json(result)
+        summary_report = _summary_report(result['file_name'], result['analysis_date'], params_total, result)
+    
+    # Create JSON download
+    st.download_button(
+        label="📥 Download Analysis Results (JSON)",
+        data=json_data,
+        file_name=f"{result['file_name']}_analysis.json",
+        mime="application/json"
+    )
+    
+    # Create summary report
+    st.download_button(
+        label="📄 Download Summary Report (Markdown)",
+        data=summary_report,
+        file_name=f"{result['file_name']}_summary.md",
+        mime="text/markdown"
+    )
+
 def main():
     """Main Streamlit app for PDF study analysis"""
     st.title("📊 PDF Lighting Study Analyzer")
     st.markdown("Upload your lighting study PDF and get comprehensive analysis with compliance checking!")
     
-    # Initialize analyzer
-    analyzer = PDFStudyAnalyzer()
-    
     # Sidebar for file upload
     with st.sidebar:
         st.header("📁 Upload PDF Study")
@@ -35,21 +351,40 @@ def main():
         )
         
         if uploaded_file is not None:
-            # Save uploaded file
-            uploads_dir = Path("uploads")
-            uploads_dir.mkdir(exist_ok=True)
+            file_buffer = uploaded_file.getbuffer()
             
-            file_path = uploads_dir / uploaded_file.name
-            with open(file_path, "wb") as f:
-                f.write(uploaded_file.getbuffer())
+            # Hash each upload once; later reruns reuse the digest from session state
+            # Older Streamlit releases expose the upload's identifier as .id rather than .file_id
+            upload_id = getattr(uploaded_file, "file_id", None) or uploaded_file.id
+            is_new_upload = st.session_state.get('uploaded_file_id') != upload_id
+            if is_new_upload:
+                st.session_state['uploaded_file_id'] = upload_id
+                st.session_state['uploaded_hash'] = hashlib.md5(file_buffer).hexdigest()
+            file_digest = st.session_state['uploaded_hash']
+            
+            # Save uploaded file under its digest so sessions uploading different files with the same name never share a copy
+            file_path = UPLOADS_DIR / file_digest / uploaded_file.name
+            if not file_path.exists() or file_path.stat().st_size != len(file_buffer):
+                file_path.parent.mkdir(exist_ok=True)
+                temp_file = file_path.with_name(file_path.name + ".tmp")
+                with open(temp_file, "wb") as f:
+                    f.write(file_buffer)
+                temp_file.replace(file_path)
+            
+            standards_version = _standards_version()
             
             st.success(f"✅ File uploaded: {uploaded_file.name}")
             
+            # Show a stored analysis of the same file straight away
+            if is_new_upload and _indexed_analysis_path(file_digest, standards_version).exists():
+                st.session_state['analysis_result'] = _analyze(file_digest, standards_version, uploaded_file.name, file_path)
+                st.info("ℹ️ Loaded the stored analysis of this file")
+            
             # Analyze button
             if st.button("🔍 Analyze Study", type="primary"):
                 with st.spinner("Analyzing PDF study..."):
                     try:
-                        result = analyzer.analyze_pdf_study(file_path)
+                        result = _analyze(file_digest, standards_version, uploaded_file.name, file_path)
                         st.session_state['analysis_result'] = result
                         st.success("✅ Analysis completed!")
                     except Exception as e:
@@ -58,189 +393,13 @@ def main():
     # Main content area
     if 'analysis_result' in st.session_state:
         result = st.session_state['analysis_result']
+        params_total = sum(result['summary']['parameters_found'].values())
         
-        # Display summary
-        st.header("📋 Analysis Summary")
-        
-        col1, col2, col3, col4 = st.columns(4)
-        
-        with col1:
-            st.metric(
-                "Rooms Analyzed",
-                result['summary']['total_rooms_analyzed']
-            )
-        
-        with col2:
-            st.metric(
-                "Parameters Found",
-                sum(result['summary']['parameters_found'].values())
-            )
-        
-        with col3:
-            compliance = result['summary']['overall_compliance']
-            compliance_color = "🟢" if compliance == "compliant" else "🔴" if compliance == "non_compliant" else "🟡"
-            st.metric(
-                "Overall Compliance",
-                f"{compliance_color} {compliance.title()}"
-            )
-        
-        with col4:
-            st.metric(
-                "Analysis Date",
-                result['analysis_date'][:10]
-            )
-        
-        # Display key findings
-        st.header("🔍 Key Findings")
-        for finding in result['summary']['key_findings']:
-            st.write(f"• {finding}")
-        
-        # Display recommendations
-        st.header("💡 Recommendations")
-        for rec in result['summary']['recommendations']:
-            st.write(f"• {rec}")
-        
-        # Room analysis
-        if result['room_data']:
-            st.header("🏢 Room Analysis")
-            
-            # Create room data table
-            room_data = []
-            for room in result['room_data']:
-                room_info = {
-                    'Room': room['name'],
-                    'Illuminance (lux)': room.get('illuminance', {}).get('value', 'N/A'),
-                    'UGR': room.get('ugr', {}).get('value', 'N/A'),
-                    'CRI': room.get('cri', {}).get('value', 'N/A'),
-                    'Uniformity': room.get('uniformity', {}).get('value', 'N/A')
-                }
-                room_data.append(room_info)
-            
-            if room_data:
-                df = pd.DataFrame(room_data)
-                st.dataframe(df, use_container_width=True)
-                
-                # Create visualizations
-                col1, col2 = st.columns(2)
-                
-                with col1:
-                    # Illuminance chart
-                    illuminance_data = [r.get('illuminance', {}).get('value') for r in result['room_data'] if r.get('illuminance')]
-                    if illuminance_data:
-                        fig = px.bar(
-                            x=[r['name'] for r in result['room_data'] if r.get('illuminance')],
-                            y=illuminance_data,
-                            title="Room Illuminance Levels",
-                            labels={'x': 'Room', 'y': 'Illuminance (lux)'}
-                        )
-                        fig.add_hline(y=500, line_dash="dash", line_color="green", annotation_text="Recommended (500 lux)")
-                        fig.add_hline(y=300, line_dash="dash", line_color="orange", annotation_text="Minimum (300 lux)")
-                        st.plotly_chart(fig, use_container_width=True)
-                
-                with col2:
-                    # UGR chart
-                    ugr_data = [r.get('ugr', {}).get('value') for r in result['room_data'] if r.get('ugr')]
-                    if ugr_data:
-                        fig = px.bar(
-                            x=[r['name'] for r in result['room_data'] if r.get('ugr')],
-                            y=ugr_data,
-                            title="Room UGR Levels",
-                            labels={'x': 'Room', 'y': 'UGR'}
-                        )
-                        fig.add_hline(y=19, line_dash="dash", line_color="red", annotation_text="Maximum (19)")
-                        st.plotly_chart(fig, use_container_width=True)
-        
-        # Compliance analysis
-        if result['compliance_analysis']['room_compliance']:
-            st.header("✅ Compliance Analysis")
-            
-            compliance_data = []
-            for room_comp in result['compliance_analysis']['room_compliance']:
-                compliance_info = {
-                    'Room': room_comp['room_name'],
-                    'Status': room_comp['status'].title(),
-                    'Issues': len(room_comp['issues']),
-                    'Recommendations': len(room_comp['recommendations'])
-                }
-                compliance_data.append(compliance_info)
-            
-            if compliance_data:
-                df = pd.DataFrame(compliance_data)
-                st.dataframe(df, use_container_width=True)
-                
-                # Show detailed compliance for each room
-                for room_comp in result['compliance_analysis']['room_compliance']:
-                    with st.expander(f"📋 {room_comp['room_name']} - {room_comp['status'].title()}"):
-                        if room_comp['issues']:
-                            st.write("**Issues:**")
-                            for issue in room_comp['issues']:
-                                st.write(f"❌ {issue}")
-                        
-                        if room_comp['recommendations']:
-                            st.write("**Recommendations:**")
-                            for rec in room_comp['recommendations']:
-                                st.write(f"✅ {rec}")
-        
-        # Extracted data
-        st.header("📊 Extracted Data")
-        
-        for param_type, values in result['extracted_data'].items():
-            if values:
-                with st.expander(f"🔍 {param_type.title()} ({len(values)} values found)"):
-                    for i, value in enumerate(values):
-                        st.write(f"**Value {i+1}:** {value['value']}")
-                        st.write(f"**Confidence:** {value['confidence']:.2f}")
-                        st.write(f"**Context:** {value['context'][:200]}...")
-                        st.write("---")
-        
-        # Download results
-        st.header("💾 Download Results")
-        
-        # Create JSON download
-        json_str = json.dumps(result, indent=2, ensure_ascii=False)
-        st.download_button(
-            label="📥 Download Analysis Results (JSON)",
-            data=json_str,
-            file_name=f"{result['file_name']}_analysis.json",
-            mime="application/json"
-        )
-        
-        # Create summary report
-        summary_report = f"""
-# Lighting Study Analysis Report
-
-## File: {result['file_name']}
-## Analysis Date: {result['analysis_date']}
-
-## Summary
-- **Rooms Analyzed:** {result['summary']['total_rooms_analyzed']}
-- **Overall Compliance:** {result['summary']['overall_compliance']}
-- **Parameters Found:** {sum(result['summary']['parameters_found'].values())}
-
-## Key Findings
-{chr(10).join([f"- {finding}" for finding in result['summary']['key_findings']])}
-
-## Recommendations
-{chr(10).join([f"- {rec}" for rec in result['summary']['recommendations']])}
-
-## Room Analysis
-"""
-        
-        for room in result['room_data']:
-            summary_report += f"\n### {room['name']}\n"
-            if room.get('illuminance'):
-                summary_report += f"- Illuminance: {room['illuminance']['value']} lux\n"
-            if room.get('ugr'):
-                summary_report += f"- UGR: {room['ugr']['value']}\n"
-            if room.get('cri'):
-                summary_report += f"- CRI: {room['cri']['value']}\n"
-        
-        st.download_button(
-            label="📄 Download Summary Report (Markdown)",
-            data=summary_report,
-            file_name=f"{result['file_name']}_summary.md",
-            mime="text/markdown"
-        )
+        render_summary(result, params_total)
+        render_room_analysis(result)
+        render_compliance(result)
+        render_extracted(result)
+        render_downloads(result, params_total)
     
     else:
         # Welcome message
@@ -273,13 +432,11 @@ def main():
         st.header("📋 Example Analysis")
         
         # Check if there are any existing analyses
-        studies_dir = Path("studies")
-        if studies_dir.exists():
-            analysis_files = list(studies_dir.glob("*_analysis.json"))
-            if analysis_files:
-                st.write("**Recent Analyses:**")
-                for analysis_file in analysis_files[-3:]:  # Show last 3
-                    st.write(f"• {analysis_file.stem}")
+        recent_analyses = _recent_analyses()
+        if recent_analyses:
+            st.write("**Recent Analyses:**")
+            for analysis_name in recent_analyses:
+                st.write(f"• {analysis_name}")
 
 if __name__ == "__main__":
     main()